@@ -1,14 +1,27 @@
-import json
+import asyncio
+from contextlib import closing
+import hashlib
+import os
 from pathlib import Path
 import re
-from typing import List
-from llama_index.core import VectorStoreIndex, Document
+import sqlite3
+from typing import Dict, Iterable, Iterator, List
+from llama_index.core.base.embeddings.base import BaseEmbedding
 from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import MetadataMode, TextNode
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
 from llama_index.embeddings.openai import OpenAIEmbedding
-from llama_index.vector_stores.chroma import ChromaVectorStore
-from llama_index.core.storage.storage_context import StorageContext
 import chromadb
+import diskcache
+import ijson
 from dotenv import load_dotenv
+from openai import RateLimitError
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,7 +33,7 @@ What it does:
 - Loads JSON with 'title', 'url', 'content' fields
 - Cleans and filters the content
 - Splits into semantic chunks
-- Embeds using OpenAI
+- Embeds using OpenAI, or locally with fastembed for Hugging Face model names
 - Stores the embeddings into Chroma DB
 
 Improvements:
@@ -31,10 +44,30 @@ Improvements:
 
 How to run:
     poetry run python data/embedder.py
+
+    # Local embeddings, no API calls (needs the local-embeddings dependency group).
+    # Vector size differs from OpenAI's, so delete db/minecraft_lore first.
+    EMBED_MODEL=BAAI/bge-small-en-v1.5 poetry run python data/embedder.py
 """
 
 DATA_PATH = Path("data/lore.json")
 DB_DIR = "db/minecraft_lore"
+EMBED_MODEL = os.environ.get("EMBED_MODEL", "text-embedding-3-small")
+EMBED_BATCH_SIZE = 100  # texts per embedding request
+EMBED_CONCURRENCY = 8  # embedding requests in flight at once
+EMBED_CACHE_DIR = "db/embed_cache"
+CHROMA_BATCH_SIZE = 250  # rows per collection.upsert call
+
+
+# Single-character replacements applied in one str.translate pass
+_NORMALIZE_TABLE = str.maketrans(
+    {
+        "⁄": "/",  # Unicode fraction slash
+        "\u200c": "",  # Zero-width non-joiner
+        "\u200b": "",  # Zero-width space
+    }
+)
+_EDITION_MARKER_RE = re.compile(r"\u200c\[(BE|JE) only\]")
 
 
 def normalize_text(text: str) -> str:
@@ -46,35 +79,22 @@ def normalize_text(text: str) -> str:
     - Handle Bedrock/Java Edition markers
     - Preserve important formatting
     """
-    # Convert Unicode fraction slash to regular slash
+    # Convert spaced Unicode fraction slash first, then the single characters
     text = text.replace(" ⁄ ", "/")
-    text = text.replace("⁄", "/")
-    
-    # Normalize special Unicode spaces
-    text = text.replace("\u200c", "")  # Zero-width non-joiner
-    text = text.replace("\u200b", "")  # Zero-width space
-    
-    # Normalize edition markers for better matching
-    # Keep original but add normalized version
-    if "‌[BE only]" in text or "‌[JE only]" in text:
-        text = re.sub(r"‌\[(BE|JE) only\]", r" [\1 only]", text)
-    
-    return text
+    text = text.translate(_NORMALIZE_TABLE)
 
-
-def load_lore_json(path: Path) -> List[dict]:
-    """Load structured Minecraft wiki data."""
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # Normalize edition markers for better matching
+    return _EDITION_MARKER_RE.sub(r" [\1 only]", text)
 
 
-def filter_redundant_text(text: str) -> bool:
-    """Filter out noisy or redundant paragraphs."""
-    return len(text.strip()) > 30
+def iter_lore_json(path: Path) -> Iterator[dict]:
+    """Stream structured Minecraft wiki entries one at a time."""
+    with open(path, "rb") as f:
+        yield from ijson.items(f, "item")
 
 
-def split_and_prepare_documents(lore_data: List[dict]) -> List[Document]:
-    """Split content into semantic chunks.
+def split_and_prepare_documents(lore_data: Iterable[dict]) -> Iterator[TextNode]:
+    """Split content into semantic chunks, built directly as TextNodes.
     
     Improvements:
     - Larger chunks (512 chars) to keep related info together
@@ -82,6 +102,10 @@ def split_and_prepare_documents(lore_data: List[dict]) -> List[Document]:
     - URLs added to chunk text for searchability
     - Text normalization for special characters
     - Title and URL added at the beginning for better link retrieval
+    - Yields nodes as entries are read, so it can consume a streamed lore file
+    - Identical chunks are emitted once; other pages containing them are listed in
+      the first copy's "also_in" metadata, which fills in until the generator is
+      exhausted
     """
     splitter = SentenceSplitter(
         chunk_size=512,
@@ -89,72 +113,179 @@ def split_and_prepare_documents(lore_data: List[dict]) -> List[Document]:
         paragraph_separator="\n\n",
         secondary_chunking_regex="[^,.;。？！]+[,.;。？！]?",
     )
-    docs = []
-
+    seen: Dict[str, TextNode] = {}
     for entry in lore_data:
         # Normalize text before chunking
         normalized_content = normalize_text(entry["content"])
         
         chunks = splitter.split_text(normalized_content)
-        filtered_chunks = filter(filter_redundant_text, chunks)
+        # Drop noisy fragments; SentenceSplitter already strips each chunk
+        filtered_chunks = (chunk for chunk in chunks if len(chunk) > 30)
 
         for chunk in filtered_chunks:
+            # Shared tables and snippets recur across pages; embed each chunk body once
+            chunk_hash = hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+            first = seen.get(chunk_hash)
+            if first is not None:
+                also_in = first.metadata.get("also_in", "")
+                if entry["url"] != first.metadata["url"] and entry["url"] not in also_in.split():
+                    first.metadata["also_in"] = f"{also_in} {entry['url']}".lstrip()
+                continue
+
             # Add title and URL at the beginning and end for better searchability
             # Format: Title + URL at start, then content, then Source URL at end
             chunk_with_source = f"Title: {entry['title']}\nURL: {entry['url']}\n\n{chunk}\n\nSource: {entry['url']}"
             
-            docs.append(
-                Document(
-                    text=chunk_with_source,
-                    metadata={
-                        "source": entry["title"],
-                        "url": entry["url"],
-                        "chunk_size": len(chunk),
-                    }
-                )
+            node = TextNode(
+                # Content-derived id, so re-indexing upserts instead of duplicating rows
+                id_=chunk_hash,
+                text=chunk_with_source,
+                metadata={
+                    "source": entry["title"],
+                    "url": entry["url"],
+                    "chunk_size": len(chunk),
+                },
+                # Keep the embedded text independent of where else the chunk appears
+                excluded_embed_metadata_keys=["also_in"],
             )
-    return docs
+            seen[chunk_hash] = node
+            yield node
+
+
+def get_embed_model(model_name: str = EMBED_MODEL) -> BaseEmbedding:
+    """Return the embedding model for a name.
+
+    Hugging Face style names (e.g. "BAAI/bge-small-en-v1.5") run locally through
+    fastembed's ONNX runtime; anything else is treated as an OpenAI model.
+    """
+    if "/" in model_name:
+        # Imported lazily so OpenAI-only setups don't need fastembed installed
+        from llama_index.embeddings.fastembed import FastEmbedEmbedding
+
+        return FastEmbedEmbedding(model_name=model_name, embed_batch_size=EMBED_BATCH_SIZE)
+    return OpenAIEmbedding(model=model_name, embed_batch_size=EMBED_BATCH_SIZE)
+
 
+@retry(
+    retry=retry_if_exception_type(RateLimitError),
+    wait=wait_random_exponential(min=1, max=60),
+    stop=stop_after_attempt(6),
+    reraise=True,
+)
+async def _embed_batch(embed_model: BaseEmbedding, texts: List[str]) -> List[List[float]]:
+    """Embed one batch of texts, backing off when OpenAI rate-limits us."""
+    return await embed_model.aget_text_embedding_batch(texts)
 
-def build_vector_index(documents: List[Document]) -> VectorStoreIndex:
+
+def _cache_key(model_name: str, text: str) -> str:
+    """Key an embedding by model name and the SHA-256 of the embedded text."""
+    return f"{model_name}:{hashlib.sha256(text.encode('utf-8')).hexdigest()}"
+
+
+async def embed_all(
+    nodes: List[TextNode],
+    embed_model: BaseEmbedding,
+    concurrency: int = EMBED_CONCURRENCY,
+) -> None:
+    """Embed nodes in batches, keeping up to `concurrency` requests in flight.
+
+    Vectors already in the on-disk cache are reused; only cache misses are sent
+    to the model. Embeddings are assigned back onto the nodes in their original order.
+    """
+    texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in nodes]
+    keys = [_cache_key(embed_model.model_name, text) for text in texts]
+    sem = asyncio.Semaphore(concurrency)
+
+    with diskcache.Cache(EMBED_CACHE_DIR) as cache:
+        embeddings = [cache.get(key) for key in keys]
+        missing = [i for i, vec in enumerate(embeddings) if vec is None]
+        print(f"➡️  {len(texts) - len(missing)} embeddings cached, {len(missing)} to request.")
+        batches = [
+            missing[i : i + EMBED_BATCH_SIZE] for i in range(0, len(missing), EMBED_BATCH_SIZE)
+        ]
+
+        async def run(batch: List[int]) -> None:
+            async with sem:
+                vecs = await _embed_batch(embed_model, [texts[i] for i in batch])
+            # Cache each batch as it lands so an interrupted run keeps its progress
+            for i, vec in zip(batch, vecs):
+                embeddings[i] = vec
+                cache.set(keys[i], vec)
+
+        await asyncio.gather(*(run(batch) for batch in batches))
+
+    for node, embedding in zip(nodes, embeddings):
+        node.embedding = embedding
+
+
+def _enable_sqlite_wal(db_dir: str) -> None:
+    """Put Chroma's SQLite file in WAL mode before a bulk insert.
+
+    Chroma 1.x opens its SQLite connections from the Rust core, so per-connection
+    pragmas (synchronous, cache_size) can't be reached from Python. journal_mode=WAL
+    is stored in the database file itself and applies to Chroma's connections too.
+    Best effort: a fresh database gets it on the next run, and a locked one is skipped.
+    """
+    db_path = Path(db_dir) / "chroma.sqlite3"
+    if not db_path.exists():
+        return
+    try:
+        with closing(sqlite3.connect(db_path)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+    except sqlite3.OperationalError as e:
+        print(f"⚠️  Could not enable WAL on {db_path}: {e}")
+
+
+def build_vector_index(nodes: List[TextNode]) -> None:
     """Build and persist Chroma vector index."""
     # Create the database directory if it doesn't exist
     Path(DB_DIR).mkdir(parents=True, exist_ok=True)
 
+    _enable_sqlite_wal(DB_DIR)
     client = chromadb.PersistentClient(path=DB_DIR)
 
     # Get or create collection
     collection = client.get_or_create_collection("minecraft_lore")
 
-    # Create vector store with explicit collection
-    vector_store = ChromaVectorStore(chroma_collection=collection)
-    storage_context = StorageContext.from_defaults(vector_store=vector_store)
+    embed_model = get_embed_model(EMBED_MODEL)
 
-    # Use the same embedding model as before
-    embed_model = OpenAIEmbedding(model="text-embedding-3-small")
+    # Embed all chunks up front, EMBED_BATCH_SIZE texts per request with several
+    # requests in flight, instead of letting the index embed them while inserting
+    asyncio.run(embed_all(nodes, embed_model))
 
-    index = VectorStoreIndex.from_documents(
-        documents, embed_model=embed_model, storage_context=storage_context
-    )
-    index.storage_context.persist()
+    # Upsert into Chroma in batches of CHROMA_BATCH_SIZE rows (one SQLite transaction
+    # per call); node ids are chunk hashes, so a rerun overwrites rows in place.
+    # Metadata is flattened the way ChromaVectorStore does it, so the LlamaIndex
+    # retriever reads these rows back as regular nodes.
+    for i in range(0, len(nodes), CHROMA_BATCH_SIZE):
+        batch = nodes[i : i + CHROMA_BATCH_SIZE]
+        collection.upsert(
+            ids=[node.node_id for node in batch],
+            documents=[node.get_content() for node in batch],
+            metadatas=[
+                node_to_metadata_dict(node, remove_text=True, flat_metadata=True)
+                for node in batch
+            ],
+            embeddings=[node.embedding for node in batch],
+        )
     
     # Print statistics
-    chunk_sizes = [doc.metadata.get("chunk_size", 0) for doc in documents]
+    chunk_sizes = [node.metadata.get("chunk_size", 0) for node in nodes]
     avg_chunk_size = sum(chunk_sizes) / len(chunk_sizes) if chunk_sizes else 0
     
-    print(f"✅ {len(documents)} chunks embedded and saved to Chroma at {DB_DIR}")
+    print(f"✅ {len(nodes)} chunks embedded and saved to Chroma at {DB_DIR}")
     print(f"📊 Average chunk size: {avg_chunk_size:.0f} characters")
     print(f"📊 Chunk size range: {min(chunk_sizes)}-{max(chunk_sizes)} characters")
 
 
 if __name__ == "__main__":
-    print("➡️  Loading lore...")
-    lore = load_lore_json(DATA_PATH)
-    print(f"➡️  Processing {len(lore)} entries...")
+    print("➡️  Streaming lore entries...")
+    lore = iter_lore_json(DATA_PATH)
 
-    docs = split_and_prepare_documents(lore)
-    print(f"➡️  {len(docs)} semantic chunks ready for embedding.")
+    # Chunks are collected here because embedding batches need the full list
+    nodes = list(split_and_prepare_documents(lore))
+    print(f"➡️  {len(nodes)} semantic chunks ready for embedding.")
 
-    build_vector_index(docs)
+    build_vector_index(nodes)
 
     print("✅ Embedding complete.")
@@ -1,11 +1,24 @@
 import requests
+import requests_cache
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+import multiprocessing
 import os
-import json
+import orjson
 from urllib.parse import urlparse
 import re
-from typing import Optional, List
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, List, TextIO, Tuple
 from bs4 import Tag
+import soupsieve
+
+try:
+    import lxml  # noqa: F401
+
+    _HTML_PARSER = "lxml"
+except ImportError:  # pure-Python fallback, much slower on large wiki pages
+    _HTML_PARSER = "html.parser"
 
 # TODO: finish gold examples
 # create an eval.py script to test the examples
@@ -40,6 +53,71 @@ WIKI_PAGES = {
 }
 
 DEBUG = True
+MAX_WORKERS = 8  # pages fetched concurrently
+HTTP_CACHE_PATH = "data/.http_cache"  # sqlite file for responses cached while DEBUG is on
+HTTP_CACHE_EXPIRE_SECONDS = 24 * 60 * 60
+ETAG_CACHE_PATH = "data/.http_etag.json"  # validators + content from the last scrape
+# Unchanged pages (HTTP 304) reuse the cleaned text stored in the sidecar, so bump this
+# whenever extraction or cleanup changes; entries from other versions are re-scraped
+EXTRACTOR_VERSION = 1
+
+USER_AGENT = "minecraft-genie/0.1 (+https://github.com/Nayrobie/minecraft-genie)"
+
+_HEADER_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+_ICON_CLASSES = frozenset({"icon", "mob-icon"})
+# MediaWiki "[ edit ]" links, matched in one compiled CSS pass
+_EDIT_LINK_SELECTOR = soupsieve.compile(
+    "span.mw-editsection, span.mw-editsection-bracket, a.mw-editsection, a.mw-editsection-bracket"
+)
+_NAME_CLASSES = ["name", "mob-name"]  # label divs next to or inside an icon
+
+UNWANTED_H2_SECTIONS = [
+    "Data values",
+    "Sounds",
+    "Video",
+    "History",
+    "Issues",
+    "Gallery",
+    "See also",
+    "Screenshots",
+    "References",
+    "External links",
+    "Navigation",
+    "Changed recipes",
+    "Complete recipe list",
+]
+UNWANTED_H3_SECTIONS = [
+    "Unused mobs",
+    "Education mobs",
+    "Removed mobs",
+    "Joke mobs",
+    "Unimplemented mobs",
+    "Mentioned mobs",
+    "Education blocks",
+    "Removed blocks",
+    "Joke blocks",
+]
+
+# Compiled once; each section list is a single alternation so the text is
+# scanned once per header level instead of once per section. The table of
+# contents has the same shape as an unwanted H2 section and shares its pass.
+_UNWANTED_H2_PATTERN = re.compile(
+    r"H2: (?:"
+    + "|".join(map(re.escape, ["Contents", *UNWANTED_H2_SECTIONS]))
+    + r").*?(?=H2: |\Z)",
+    re.DOTALL | re.IGNORECASE,
+)
+_UNWANTED_H3_PATTERN = re.compile(
+    r"H3: (?:" + "|".join(map(re.escape, UNWANTED_H3_SECTIONS)) + r").*?(?=H3: |H2: |\Z)",
+    re.DOTALL | re.IGNORECASE,
+)
+_FOOTNOTE_PATTERN = re.compile(r"↑[a-z]+(?=[A-Z]|\s|[^a-zA-Z])")
+
+
+def _collapse_whitespace(paras: List[str]) -> str:
+    """Join paragraphs into one line with every whitespace run reduced to a single space."""
+    return " ".join(token for para in paras for token in para.split())
+
 
 def _extract_intro_before_first_table(soup: BeautifulSoup) -> str:
     """
@@ -64,19 +142,20 @@ def _extract_intro_before_first_table(soup: BeautifulSoup) -> str:
             txt = p.get_text(" ", strip=True)
             if txt:
                 paras.append(txt)
-        return re.sub(r"\s{2,}", " ", " ".join(paras)).strip()
+        return _collapse_whitespace(paras)
 
     # Collect text from siblings that appear BEFORE the first table
     paras: List[str] = []
-    for el in list(main.children):
-        if isinstance(el, Tag) and el.name == "table":
+    for el in main.children:
+        if not isinstance(el, Tag):
+            continue
+        if el.name == "table":
             break
-        if isinstance(el, Tag) and el.name in {"p", "div"}:
+        if el.name in {"p", "div"}:
             txt = el.get_text(" ", strip=True)
             if txt:
                 paras.append(txt)
-    intro: str = " ".join(paras)
-    return re.sub(r"\s{2,}", " ", intro).strip()
+    return _collapse_whitespace(paras)
 
 def _is_minecraft_crafting_webpage(url: str) -> bool:
     """
@@ -95,70 +174,127 @@ def _is_minecraft_crafting_webpage(url: str) -> bool:
     return "minecraftcrafting.info" in host
 
 
-def _fetch_soup(url: str) -> BeautifulSoup:
-    """Fetch URL and parse into BeautifulSoup."""
-    response = requests.get(url, timeout=30)
-    response.raise_for_status()
-    return BeautifulSoup(response.text, "html.parser")
+def _new_session() -> requests.Session:
+    """
+    Create the HTTP session shared by all page fetches of a scrape.
 
+    Pages on the same host reuse pooled keep-alive connections. While debugging,
+    responses are also cached on disk so re-runs skip the network.
 
-def _cleanup_edit_sections(soup: BeautifulSoup) -> None:
-    """Remove edit links and related artifacts from the soup in-place."""
-    for edit_link in soup.find_all(["span", "a"], class_=["mw-editsection", "mw-editsection-bracket"]):
-        edit_link.decompose()
-    for unwanted in soup.find_all(["span"], class_=["mw-headline"]):
-        if unwanted.find("span", class_="mw-editsection"):
-            unwanted.find("span", class_="mw-editsection").decompose()
+    Return:
+        requests.Session: Session to pass to `_fetch_page`; close it when done.
+    """
+    if DEBUG:
+        session = requests_cache.CachedSession(
+            HTTP_CACHE_PATH, backend="sqlite", expire_after=HTTP_CACHE_EXPIRE_SECONDS
+        )
+    else:
+        session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def _fetch_page(
+    url: str, session: requests.Session, cached: Optional[dict] = None
+) -> requests.Response:
+    """
+    Fetch URL, sending the validators stored by a previous run if any.
 
+    Args:
+        url (str): Absolute URL.
+        session (requests.Session): Session from `_new_session`.
+        cached (dict | None): Previous entry with "etag" and "last_modified" keys.
 
-def _debug_dump_soup(soup: BeautifulSoup) -> None:
-    """Optionally print a preview of the soup for debugging."""
-    if DEBUG:
-        print(soup.prettify()[:2000])
+    Return:
+        requests.Response: The response; status 304 means the page is unchanged.
+    """
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+    response = session.get(url, headers=headers, timeout=30)
+    if response.status_code != 304:
+        response.raise_for_status()
+        if DEBUG:
+            _debug_dump_html(response)
+    return response
+
+
+def _parse_soup(html: bytes) -> BeautifulSoup:
+    """Parse raw page bytes into BeautifulSoup, letting the parser decode them."""
+    return BeautifulSoup(html, _HTML_PARSER)
+
+
+def _load_validators(path: str) -> Dict[str, dict]:
+    """
+    Load the per-URL ETag/Last-Modified sidecar, or an empty dict if absent.
+
+    Entries written by a different EXTRACTOR_VERSION are dropped so their pages are
+    fetched and extracted again.
+    """
+    try:
+        with open(path, "rb") as f:
+            validators = orjson.loads(f.read())
+    except (FileNotFoundError, orjson.JSONDecodeError):
+        return {}
+    return {
+        url: entry
+        for url, entry in validators.items()
+        if entry.get("version") == EXTRACTOR_VERSION
+    }
+
+
+def _save_validators(validators: Dict[str, dict], path: str) -> None:
+    """Persist the per-URL ETag/Last-Modified sidecar."""
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(validators, option=orjson.OPT_INDENT_2))
+
+
+def _strip_edit_links(element: Tag) -> None:
+    """Remove MediaWiki edit links nested inside `element`, in place."""
+    for edit_link in _EDIT_LINK_SELECTOR.select(element):
+        edit_link.decompose()
 
 
-def _get_relevant_elements(soup: BeautifulSoup) -> List[Tag]:
-    """Return the sequence of elements we care to extract in order."""
-    return soup.find_all([
-        "p", "table", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "div"
-    ])
+def _debug_dump_html(response: requests.Response, limit: int = 2000) -> None:
+    """Print the first `limit` bytes of the raw page for debugging."""
+    print(response.content[:limit].decode(response.encoding or "utf-8", errors="replace"))
 
 
 def _extract_icon_label(element: Tag) -> Optional[str]:
     """Extract icon/mob label text if the element is an icon container."""
-    icon_classes = {"icon", "mob-icon"}
     if element.name != "div":
         return None
-    elem_classes = set(element.get("class", []))
-    if not (elem_classes & icon_classes):
+    classes = element.get("class")
+    if not classes or _ICON_CLASSES.isdisjoint(classes):
         return None
 
-    name_div = element.find_next_sibling("div", class_="name") or element.find_next_sibling("div", class_="mob-name")
-    if name_div:
-        img_name = name_div.get_text(strip=True)
-        if img_name:
-            return f"IMAGE_LABEL: {img_name}"
-        return None
+    # A name div (next to the icon, else inside it) is authoritative even when empty
+    name_div = element.find_next_sibling("div", class_=_NAME_CLASSES) or element.find(
+        "div", class_=_NAME_CLASSES
+    )
+    if name_div is not None:
+        label = name_div.get_text(strip=True)
+    else:
+        img_tag = element.find("img")
+        label = (img_tag and (img_tag.get("alt") or img_tag.get("title"))) or element.get_text(
+            strip=True
+        )
+    return f"IMAGE_LABEL: {label}" if label else None
 
-    name_child = element.find("div", class_="name") or element.find("div", class_="mob-name")
-    if name_child:
-        img_name = name_child.get_text(strip=True)
-        if img_name:
-            return f"IMAGE_LABEL: {img_name}"
-        return None
 
-    img_tag = element.find("img")
-    if img_tag:
-        alt_text = img_tag.get("alt")
-        title_text = img_tag.get("title")
-        label = alt_text or title_text
-        if label:
-            return f"IMAGE_LABEL: {label}"
-
-    possible_name = element.get_text(strip=True)
-    if possible_name:
-        return f"IMAGE_LABEL: {possible_name}"
-    return None
+def _iter_table_rows(table: Tag) -> Iterator[Tag]:
+    """Yield the table's own rows, skipping rows that belong to nested tables."""
+    for child in table.find_all(["thead", "tbody", "tfoot", "tr"], recursive=False):
+        if child.name == "tr":
+            yield child
+        else:
+            yield from child.find_all("tr", recursive=False)
 
 
 def _extract_table_text(element: Tag) -> Optional[str]:
@@ -166,28 +302,33 @@ def _extract_table_text(element: Tag) -> Optional[str]:
     if element.name != "table":
         return None
 
-    table_content: List[str] = []
-    rows = element.find_all("tr")
-    for row in rows:
-        cells = row.find_all(["th", "td"])
-        if cells:
-            row_text = " | ".join(
+    # get_text walks the cell's subtree, so compute it once per cell
+    row_texts = (
+        " | ".join(
+            text
+            for text in (
                 cell.get_text(strip=True)
-                for cell in cells
-                if cell.get_text(strip=True)
+                for cell in row.find_all(["th", "td"], recursive=False)
             )
-            if row_text:
-                table_content.append(row_text)
-
-    if table_content:
-        return "\nTABLE:\n" + "\n".join(table_content) + "\n"
+            if text
+        )
+        for row in _iter_table_rows(element)
+    )
+    table_text = "\n".join(row_text for row_text in row_texts if row_text)
+    if table_text:
+        # Trailing newline keeps a blank line after the table, which the
+        # embedder's splitter treats as a paragraph break
+        return f"\nTABLE:\n{table_text}\n"
     return None
 
 
 def _extract_header_text(element: Tag) -> Optional[str]:
     """Extract header text formatted with level prefix (e.g., H2:)."""
-    if element.name not in ["h1", "h2", "h3", "h4", "h5", "h6"]:
+    if element.name not in _HEADER_TAGS:
         return None
+    # Edit links only end up inside headings, so they are stripped here rather
+    # than in a separate pass over the whole page
+    _strip_edit_links(element)
     header_text = element.get_text(strip=True)
     if header_text:
         return f"{element.name.upper()}: {header_text}"
@@ -237,21 +378,34 @@ def _extract_paragraph_text(element: Tag, is_crafting_site: bool) -> Optional[st
     return text if text else None
 
 
-def _scrape_page(url: str) -> str:
+def _build_handlers(
+    is_tutorials_page: bool, is_crafting_site: bool
+) -> Dict[str, Callable[[Tag], Optional[str]]]:
+    """Map each tag name we extract to the extractor that handles it."""
+    list_handler = partial(_extract_list_text, is_tutorials_page=is_tutorials_page)
+    return {
+        "div": _extract_icon_label,
+        "table": _extract_table_text,
+        **dict.fromkeys(_HEADER_TAGS, _extract_header_text),
+        "ul": list_handler,
+        "ol": list_handler,
+        "p": partial(_extract_paragraph_text, is_crafting_site=is_crafting_site),
+    }
+
+
+def _scrape_page(url: str, html: bytes) -> str:
     """
     Scrape the content of a wiki page and return it as a string.
     Args:
         url (str): The URL of the wiki page to scrape.
+        html (bytes): The raw page body.
     Returns:
         str: The text content of the page including paragraphs and tables in original order.
     """
-    soup = _fetch_soup(url)
+    soup = _parse_soup(html)
 
     is_crafting_site = _is_minecraft_crafting_webpage(url)
 
-    _cleanup_edit_sections(soup)
-    _debug_dump_soup(soup)
-
     content_parts: List[str] = []
 
     # Determine if this is the tutorials page
@@ -259,40 +413,24 @@ def _scrape_page(url: str) -> str:
 
     # Special handling for minecraftcrafting.info: capture only the intro text before the first table once.
     if is_crafting_site:
+        _strip_edit_links(soup)  # the intro reads whole divs, not just headings
         intro_text = _extract_intro_before_first_table(soup)
         if intro_text:
             content_parts.append(intro_text)
 
-    # Find all relevant elements in order (paragraphs, tables, headers, etc.)
-    for element in _get_relevant_elements(soup):
-        # 1) Icon/mob labels
-        icon_label = _extract_icon_label(element)
-        if icon_label:
-            content_parts.append(icon_label)
-            continue
-
-        # 2) Tables
-        table_text = _extract_table_text(element)
-        if table_text:
-            content_parts.append(table_text)
-            continue
-
-        # 3) Headers
-        header_text = _extract_header_text(element)
-        if header_text:
-            content_parts.append(header_text)
-            continue
-
-        # 4) Lists
-        list_text = _extract_list_text(element, is_tutorials_page)
-        if list_text:
-            content_parts.append(list_text)
-            continue
-
-        # 5) Paragraphs
-        para_text = _extract_paragraph_text(element, is_crafting_site)
-        if para_text:
-            content_parts.append(para_text)
+    # Walk the tree once in document order, dispatching on tag name
+    # (icon labels, tables, headers, lists, paragraphs)
+    handlers = _build_handlers(is_tutorials_page, is_crafting_site)
+    node = soup.contents[0] if soup.contents else None
+    while node is not None:
+        handler = handlers.get(node.name) if isinstance(node, Tag) else None
+        if handler is not None:
+            text = handler(node)
+            if text:
+                content_parts.append(text)
+        # Read the successor only after the handler ran: headers remove their
+        # edit links in place and the tree relinks around them
+        node = node.next_element
 
     return "\n".join(content_parts)
 
@@ -310,53 +448,12 @@ def _clean_scraped_text(text: str) -> str:
     Returns:
         str: Cleaned text with unwanted sections and formatting removed.
     """
-    import re
-
-    # Clean unwanted section
-    contents_pattern = r"H2: Contents.*?(?=H2: |\Z)"
-    cleaned_text = re.sub(contents_pattern, "", text, flags=re.DOTALL | re.IGNORECASE)
-    unwanted_h2_sections = [
-        "Data values",
-        "Sounds",
-        "Video",
-        "History",
-        "Issues",
-        "Gallery",
-        "See also",
-        "Screenshots",
-        "References",
-        "External links",
-        "Navigation",
-        "Changed recipes",
-        "Complete recipe list",
-    ]
-
-    for section in unwanted_h2_sections:
-        section_pattern = rf"H2: {section}.*?(?=H2: |\Z)"
-        cleaned_text = re.sub(
-            section_pattern, "", cleaned_text, flags=re.DOTALL | re.IGNORECASE
-        )
-    # Remove unwanted H3 sections
-    unwanted_h3_sections = [
-        "Unused mobs",
-        "Education mobs",
-        "Removed mobs",
-        "Joke mobs",
-        "Unimplemented mobs",
-        "Mentioned mobs",
-        "Education blocks",
-        "Removed blocks",
-        "Joke blocks",
-    ]
-    for section in unwanted_h3_sections:
-        section_pattern = rf"H3: {section}.*?(?=H3: |H2: |\Z)"
-        cleaned_text = re.sub(
-            section_pattern, "", cleaned_text, flags=re.DOTALL | re.IGNORECASE
-        )
+    # Clean unwanted sections
+    cleaned_text = _UNWANTED_H2_PATTERN.sub("", text)
+    cleaned_text = _UNWANTED_H3_PATTERN.sub("", cleaned_text)
 
     # Remove footnote reference letters after up arrow (↑abcd)
-    footnote_pattern = r"↑[a-z]+(?=[A-Z]|\s|[^a-zA-Z])"
-    cleaned_text = re.sub(footnote_pattern, "↑", cleaned_text)
+    cleaned_text = _FOOTNOTE_PATTERN.sub("↑", cleaned_text)
 
     # Remove elements from crafting recipes website
     crafting_banner = "BasicBlocksToolsDefenceMechanismFoodOtherDyeWoolBrewing"
@@ -367,67 +464,180 @@ def _clean_scraped_text(text: str) -> str:
     return cleaned_text.strip()
 
 
-def _scrape_multiple_pages(pages: dict) -> dict:
+def _parse_and_clean(url: str, html: bytes) -> str:
+    """
+    Extract and clean the text of one downloaded page.
+
+    Pure CPU work with picklable inputs, so it can run in a worker process.
+    """
+    return _clean_scraped_text(_scrape_page(url, html))
+
+
+def _remember_validators(
+    validators: Dict[str, dict],
+    url: str,
+    etag: Optional[str],
+    last_modified: Optional[str],
+    content: str,
+) -> None:
+    """Store a freshly scraped page's ETag/Last-Modified and content for the next run."""
+    if etag or last_modified:
+        validators[url] = {
+            "version": EXTRACTOR_VERSION,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content": content,
+        }
+
+
+def _parse_when_fetched(
+    fetch: Future,
+    page: Future,
+    label: str,
+    url: str,
+    cached: Optional[dict],
+    cpu_pool: ProcessPoolExecutor,
+) -> None:
+    """
+    Done-callback for a download: resolve `page` with (content, validator headers).
+
+    Unchanged pages (HTTP 304) resolve straight from `cached`; fresh pages are sent to
+    `cpu_pool` for parsing, and only their body bytes and two headers are kept.
+    """
+    try:
+        response = fetch.result()
+    except requests.RequestException as e:
+        print(f"❌ Error scraping {label}: {e}")
+        page.set_result(("", None))
+        return
+    except BaseException as e:
+        page.set_exception(e)
+        return
+
+    if response.status_code == 304 and cached:
+        page.set_result((cached["content"], None))
+        return
+
+    headers = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+
+    def _resolve(parse: Future) -> None:
+        if parse.cancelled():
+            page.set_exception(CancelledError(f"Parsing {label} was cancelled"))
+            return
+        error = parse.exception()
+        if error is not None:
+            page.set_exception(error)
+        else:
+            page.set_result((parse.result(), headers))
+
+    # Errors raised inside a done-callback are only logged, so route them to `page`
+    # (e.g. BrokenProcessPool) or the consumer would wait on it forever
+    try:
+        cpu_pool.submit(_parse_and_clean, url, response.content).add_done_callback(_resolve)
+    except BaseException as e:
+        page.set_exception(e)
+
+
+def _scrape_multiple_pages(pages: dict) -> Iterator[Tuple[str, str]]:
     """
-    Scrape multiple wiki pages and return their content.
+    Scrape multiple wiki pages concurrently, yielding each page as soon as it is ready.
+
+    Downloads run on a thread pool; each downloaded page is parsed and cleaned in a
+    separate process so parsing uses every core instead of sharing the GIL.
+    Unchanged pages (HTTP 304) reuse the content stored by the previous run.
     Args:
         pages (dict): A dictionary where keys are page names and values are URLs.
-    Returns:
-        dict: A dictionary with page names as keys and their text content as values.
+    Yields:
+        Tuple[str, str]: (page name, text content), in the same order as `pages`.
     """
-    all_content = {}
-    for label, url in pages.items():
-        print(f"➡️ Scraping {label} from {url}...")
-        try:
-            content = _scrape_page(url)
-            content = _clean_scraped_text(content)
-            all_content[label] = content
-        except requests.RequestException as e:
-            print(f"❌ Error scraping {label}: {e}")
-            all_content[label] = ""
+    validators = _load_validators(ETAG_CACHE_PATH)
+    # forkserver workers start from a clean server process instead of forking this
+    # one while download threads hold locks
+    with (
+        ProcessPoolExecutor(mp_context=multiprocessing.get_context("forkserver")) as cpu_pool,
+        _new_session() as session,
+        ThreadPoolExecutor(max_workers=MAX_WORKERS) as io_pool,
+    ):
+        page_futures: Dict[str, Future] = {}
+        for label, url in pages.items():
+            print(f"➡️ Scraping {label} from {url}...")
+            cached = validators.get(url)
+            page_futures[label] = page = Future()
+            io_pool.submit(_fetch_page, url, session, cached).add_done_callback(
+                partial(
+                    _parse_when_fetched,
+                    page=page,
+                    label=label,
+                    url=url,
+                    cached=cached,
+                    cpu_pool=cpu_pool,
+                )
+            )
+
+        # Hand pages back in input order; later pages keep downloading and parsing meanwhile
+        for label, page in page_futures.items():
+            content, headers = page.result()
+            if headers is not None:
+                _remember_validators(validators, pages[label], *headers, content)
+            yield label, content
+    _save_validators(validators, ETAG_CACHE_PATH)
     print("✅ Scraping completed.")
-    return all_content
 
 
-def _save_to_txt(content_dict: dict, path: str) -> None:
+def _write_txt_entry(f: TextIO, page_name: str, content: str) -> None:
     """
-    Save scraped wiki content as a human-readable text file.
+    Append one scraped page to the human-readable text file.
     """
-    with open(path, "w", encoding="utf-8") as f:
-        for page_name, content in content_dict.items():
-            f.write(f"{'=' * 40}\n")
-            f.write(f"PAGE NAME: {page_name.upper()}\n")
-            f.write(f"URL: {WIKI_PAGES[page_name]}\n")
-            f.write(f"{'=' * 40}\n")
-            f.write(content)
-            f.write("\n\n")
-    print(f"✅ Saved {len(content_dict)} entries to {path}.")
-
-
-def _save_to_json(content_dict: dict, path: str) -> None:
+    f.write(
+        f"{'=' * 40}\n"
+        f"PAGE NAME: {page_name.upper()}\n"
+        f"URL: {WIKI_PAGES[page_name]}\n"
+        f"{'=' * 40}\n"
+        f"{content}\n\n"
+    )
+
+
+def _write_json_entry(f: BinaryIO, page_name: str, content: str, first: bool) -> None:
     """
-    Save scraped wiki content as a structured JSON list.
+    Append one scraped page to an open JSON array, laid out like a 2-space indented dump.
     """
-    data = []
-    for page_name, content in content_dict.items():
-        data.append(
-            {
-                "title": page_name.capitalize(),
-                "url": WIKI_PAGES[page_name],
-                "content": content,
-            }
-        )
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    print(f"✅ Saved {len(data)} entries to {path}.")
+    entry = orjson.dumps(
+        {
+            "title": page_name.capitalize(),
+            "url": WIKI_PAGES[page_name],
+            "content": content,
+        },
+        option=orjson.OPT_INDENT_2,
+    )
+    # Nest the object one level inside the array; encoded JSON strings contain no raw newlines
+    f.write((b"\n  " if first else b",\n  ") + entry.replace(b"\n", b"\n  "))
 
 
 if __name__ == "__main__":
-    results = _scrape_multiple_pages(WIKI_PAGES)
-
     json_output_path = "data/lore.json"
+    txt_output_path = "data/lore.txt"
     os.makedirs(os.path.dirname(json_output_path), exist_ok=True)
-    _save_to_json(results, json_output_path)
 
-    txt_output_path = "data/lore.txt"
-    _save_to_txt(results, txt_output_path)
+    # Write each page as soon as it is scraped, so nothing accumulates in memory.
+    # Output goes to temporary files that replace the previous lore files only once
+    # the run succeeds; a failed or interrupted run leaves the old files untouched.
+    json_tmp_path = f"{json_output_path}.tmp"
+    txt_tmp_path = f"{txt_output_path}.tmp"
+    count = 0
+    try:
+        with open(json_tmp_path, "wb") as json_file, open(
+            txt_tmp_path, "w", encoding="utf-8"
+        ) as txt_file:
+            json_file.write(b"[")
+            for page_name, content in _scrape_multiple_pages(WIKI_PAGES):
+                _write_json_entry(json_file, page_name, content, first=count == 0)
+                _write_txt_entry(txt_file, page_name, content)
+                count += 1
+            json_file.write(b"\n]" if count else b"]")
+        os.replace(json_tmp_path, json_output_path)
+        os.replace(txt_tmp_path, txt_output_path)
+    finally:
+        for tmp_path in (json_tmp_path, txt_tmp_path):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    print(f"✅ Saved {count} entries to {json_output_path} and {txt_output_path}.")
@@ -4,8 +4,14 @@ This helps identify what needs to be added to the web scraping.
 """
 
 import json
+import re
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Iterable, List, Dict, Set
+
+try:
+    import ahocorasick
+except ImportError:  # Optional: fall back to one regex search per snippet
+    ahocorasick = None
 
 # Paths
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -19,38 +25,46 @@ def load_json(path: Path) -> List[Dict]:
         return json.load(f)
 
 
+# Zero-width characters dropped before searching
+_ZERO_WIDTH_TABLE = str.maketrans({"\u200c": None, "\u200b": None})
+
+
+def normalize_glyphs(text: str) -> str:
+    """Remove zero-width characters and normalize fraction slashes, keeping case."""
+    # Spaced form first so " ⁄ " collapses to "/"
+    return text.translate(_ZERO_WIDTH_TABLE).replace(" ⁄ ", "/").replace("⁄", "/")
+
+
 def normalize_for_search(text: str) -> str:
     """Normalize text for more flexible searching."""
-    # Convert to lowercase
-    text = text.lower()
-    # Remove special Unicode characters
-    text = text.replace("\u200c", "")  # Zero-width non-joiner
-    text = text.replace("\u200b", "")  # Zero-width space
-    text = text.replace("‌", "")
-    # Normalize fractions
-    text = text.replace(" ⁄ ", "/")
-    text = text.replace("⁄", "/")
-    return text
-
-
-def find_snippet_in_content(snippet: str, content: str, context_chars: int = 100) -> Tuple[bool, str]:
+    return normalize_glyphs(text.lower())
+
+
+def _compile_snippet(snippet: str) -> re.Pattern:
+    """Case-insensitive pattern for a snippet, matched against `normalize_glyphs` output."""
+    return re.compile(re.escape(normalize_glyphs(snippet)), re.IGNORECASE)
+
+
+def find_present_snippets(snippets: Iterable[str], glyph_content: str) -> Set[str]:
     """
-    Search for snippet in content with normalization.
-    Returns (found, context) tuple.
+    Return the snippets that occur in the content, ignoring case and glyph differences.
+    `glyph_content` is `normalize_glyphs(content)`. Uses a single Aho-Corasick pass
+    when pyahocorasick is installed, otherwise one case-insensitive regex per snippet
+    so the haystack never needs a lowercased copy.
     """
-    norm_snippet = normalize_for_search(snippet)
-    norm_content = normalize_for_search(content)
-    
-    if norm_snippet in norm_content:
-        # Find position in normalized content
-        idx = norm_content.find(norm_snippet)
-        # Get context from original content (approximate position)
-        start = max(0, idx - context_chars)
-        end = min(len(content), idx + len(snippet) + context_chars)
-        context = content[start:end].replace('\n', ' ')
-        return True, f"...{context}..."
-    
-    return False, ""
+    snippets = set(snippets)
+    if ahocorasick is None:
+        return {snippet for snippet in snippets if _compile_snippet(snippet).search(glyph_content)}
+
+    automaton = ahocorasick.Automaton()
+    for snippet in snippets:
+        automaton.add_word(normalize_for_search(snippet), normalize_for_search(snippet))
+    # add_word ignores the empty string, which every text contains
+    found = {""}
+    if len(automaton):
+        automaton.make_automaton()
+        found.update(norm_snippet for _, norm_snippet in automaton.iter(glyph_content.lower()))
+    return {snippet for snippet in snippets if normalize_for_search(snippet) in found}
 
 
 def check_missing_content():
@@ -65,6 +79,7 @@ def check_missing_content():
     
     # Combine all content for searching
     all_content = "\n\n".join([entry["content"] for entry in lore_data])
+    glyph_all = normalize_glyphs(all_content)
     
     # Track statistics
     total_questions = len(gold_prompts)
@@ -74,6 +89,12 @@ def check_missing_content():
     questions_with_missing = []
     
     print(f"\nAnalyzing {total_questions} questions with {total_snippets} expected snippets...\n")
+
+    # Find every snippet in one sweep over the content
+    present = find_present_snippets(
+        (s for q in gold_prompts for s in q["expected_answer_contains"]),
+        glyph_all,
+    )
     
     # Check each question
     for i, prompt in enumerate(gold_prompts, 1):
@@ -84,9 +105,7 @@ def check_missing_content():
         # Check each snippet
         missing_for_question = []
         for snippet in expected_snippets:
-            found, context = find_snippet_in_content(snippet, all_content)
-            
-            if found:
+            if snippet in present:
                 found_snippets += 1
             else:
                 missing_for_question.append(snippet)
@@ -1,14 +1,22 @@
+import functools
+import hashlib
 import json
+import math
 from pathlib import Path
 from typing import List
-from typing import Dict, Tuple, Optional
+from typing import BinaryIO, Dict, NamedTuple, Tuple, Optional
 import os
 import re
-import urllib.parse
 from llama_index.embeddings.openai import OpenAIEmbedding
-from llama_index.vector_stores.chroma import ChromaVectorStore
-from llama_index.core import VectorStoreIndex, StorageContext
 import chromadb
+import diskcache
+import numpy as np
+import orjson
+
+try:
+    import ahocorasick
+except ImportError:  # Optional: fall back to plain substring checks
+    ahocorasick = None
 
 from dotenv import load_dotenv, find_dotenv
 
@@ -18,12 +26,22 @@ GOLD_PROMPTS_PATH = "evaluation/gold_prompts.json"
 DB_PATH = "db/minecraft_lore"
 COLLECTION_NAME = "minecraft_lore"
 K_DEFAULT = 5  # default top-k for retrieval
+QUERY_EMBED_CACHE_DIR = "evaluation/.embed_cache"  # question embeddings reused across runs
+EVAL_VERBOSE = bool(os.environ.get("EVAL_VERBOSE"))  # print every retrieved hit
+
+_WS_RE = re.compile(r"\s+")
+# Common metadata keys we might have used during indexing, checked in order
+_URL_METADATA_KEYS = ("url", "source_url", "page_url", "origin_url", "link")
+_WIKI_RE = re.compile(r"https?://(?:www\.)?minecraft\.wiki[^\s\)]*")
 
 
+@functools.lru_cache(maxsize=None)
 def _load_gold_prompts(path: Path) -> List[dict]:
     """
     Load and lightly validate the gold prompts JSON file.
 
+    Cached per path; callers must not mutate the returned list.
+
     Args:
         path (Path): Path to a JSON file containing a list of prompt dicts.
 
@@ -43,6 +61,7 @@ def _load_gold_prompts(path: Path) -> List[dict]:
     return prompts
 
 
+@functools.lru_cache(maxsize=4096)
 def _normalize_url(url: Optional[str]) -> str:
     """
     Normalize a URL for robust equality checks.
@@ -55,23 +74,17 @@ def _normalize_url(url: Optional[str]) -> str:
     """
     if not url:
         return ""
+    # Plain string splits: only the host and path matter here
     url = url.strip()
-    try:
-        parts = urllib.parse.urlsplit(url)
-        netloc = parts.netloc.lower()
-        if netloc.startswith("www."):
-            netloc = netloc[4:]
-        path = parts.path.rstrip("/")
-        # ignore query and fragment by design
-        return f"{netloc}{path}"
-    except Exception:
-        # Fallback: lowercased, stripped scheme and trailing slash
-        url = re.sub(r"^https?://", "", url, flags=re.IGNORECASE)
-        url = url.rstrip("/").lower()
-        url = url[4:] if url.startswith("www.") else url
-        return url
+    _, sep, rest = url.partition("://")
+    rest = rest if sep else url
+    rest = rest.partition("#")[0].partition("?")[0]  # ignore query and fragment by design
+    netloc, _, path = rest.partition("/")
+    netloc = netloc.lower().removeprefix("www.")
+    return f"{netloc}/{path}".rstrip("/")
 
 
+@functools.lru_cache(maxsize=8192)
 def _normalize_text(text: Optional[str]) -> str:
     """
     Normalize free text for substring matching.
@@ -92,23 +105,23 @@ def _normalize_text(text: Optional[str]) -> str:
     text = text.replace("\u00A0", " ")  # non-breaking spaces
     # Lowercase and collapse whitespace
     lowered = text.lower()
-    collapsed = re.sub(r"\s+", " ", lowered).strip()
+    collapsed = _WS_RE.sub(" ", lowered).strip()
     return collapsed
 
 
-def _extract_url_from_hit(hit) -> str:
+def _extract_url_from_hit(hit, text: Optional[str] = None) -> str:
     """
     Extract a URL from a retrieved hit's metadata or text as a fallback.
 
     Args:
         hit (Any): LlamaIndex NodeWithScore-like object.
+        text (str | None): The hit's text if already fetched, to avoid calling get_text() again.
 
     Return:
         str: A URL string if found, else empty string.
     """
     md = hit.metadata or {}
-    # Common metadata keys we might have used during indexing
-    for key in ("url", "source_url", "page_url", "origin_url", "link"):
+    for key in _URL_METADATA_KEYS:
         val = md.get(key)
         if isinstance(val, str) and val.strip():
             return val
@@ -116,21 +129,68 @@ def _extract_url_from_hit(hit) -> str:
     file_path = md.get("file_path")
     if isinstance(file_path, str) and file_path.startswith("http"):
         return file_path
-    # Fallback: try to find a minecraft wiki link in the chunk text
-    text = hit.get_text() or ""
-    m = re.search(r"https?://(?:www\.)?minecraft\.wiki[^\s\)]*", text)
+    # Fallback: try to find a minecraft wiki link in the chunk text (only reached without metadata)
+    if text is None:
+        text = hit.get_text()
+    m = _WIKI_RE.search(text or "")
     return m.group(0) if m else ""
 
 
-def _get_retriever(k_default: int = K_DEFAULT):
+def _covers_all(snippets: List[str], texts: List[str]) -> bool:
+    """
+    Check that every snippet occurs in at least one of the texts.
+
+    With pyahocorasick installed, each text is scanned once for all snippets.
+
+    Args:
+        snippets (List[str]): Normalized snippets to look for.
+        texts (List[str]): Normalized hit texts.
+
+    Return:
+        bool: True if all snippets are covered.
+    """
+    if ahocorasick is None or "" in snippets:
+        return all(any(s in txt for txt in texts) for s in snippets)
+
+    automaton = ahocorasick.Automaton()
+    for s in snippets:
+        automaton.add_word(s, s)
+    automaton.make_automaton()
+    wanted = set(snippets)
+    seen = set()
+    for txt in texts:
+        seen.update(s for _, s in automaton.iter(txt))
+        if seen >= wanted:
+            return True
+    return False
+
+
+def _make_embed_model(model_name: str):
     """
-    Create and return a LlamaIndex retriever backed by Chroma.
+    Build the embedding model matching the one used by data/embedder.py.
 
     Args:
-        k_default (int): Default top-k for similarity search.
+        model_name (str): OpenAI model name, or a Hugging Face name (with "/") for fastembed.
 
     Return:
-        Any: A LlamaIndex retriever object with similarity_top_k preset.
+        Any: A LlamaIndex embedding model.
+    """
+    if "/" in model_name:
+        from llama_index.embeddings.fastembed import FastEmbedEmbedding
+
+        return FastEmbedEmbedding(model_name=model_name)
+    return OpenAIEmbedding(model=model_name)
+
+
+@functools.lru_cache(maxsize=None)
+def _open_collection():
+    """
+    Open the Chroma collection and the embedding model used to query it.
+
+    Cached so repeated evaluations reuse one client and embedding model.
+
+    Return:
+        Tuple[chromadb.Collection, Any]: (Chroma collection, LlamaIndex embedding model).
     """
     client = chromadb.PersistentClient(path=DB_PATH)
     collection = client.get_collection(COLLECTION_NAME)
@@ -140,122 +200,238 @@ def _get_retriever(k_default: int = K_DEFAULT):
         )
     except Exception:
         pass
-    vector_store = ChromaVectorStore(chroma_collection=collection)
-    storage_context = StorageContext.from_defaults(vector_store=vector_store)
 
     # Ensure the same embedding model used during indexing
     embed_model_name = os.environ.get("EMBED_MODEL", "text-embedding-3-small")
-    embed_model = OpenAIEmbedding(model=embed_model_name)
+    embed_model = _make_embed_model(embed_model_name)
 
-    index = VectorStoreIndex.from_vector_store(
-        vector_store,
-        storage_context=storage_context,
-        embed_model=embed_model,
-    )
-    retriever = index.as_retriever(similarity_top_k=k_default)
     print(
         f"✅ Retriever initialized with collection '{COLLECTION_NAME}' containing {collection.count()} items"
     )
-    return retriever
+    return collection, embed_model
 
 
-def _evaluate_retriever(
-    gold_prompts: List[dict], retriever, k: int = K_DEFAULT
-) -> Tuple[List[dict], Dict[str, float]]:
+def _query_cache_key(model_name: str, question: str) -> str:
+    """Key a question embedding by the SHA-256 of model name and question text."""
+    return hashlib.sha256(f"{model_name}\x00{question}".encode("utf-8")).hexdigest()
+
+
+def _batch_embed(prompts: List[dict], embed_model) -> List[np.ndarray]:
     """
-    Evaluate retrieval quality against gold prompts without invoking an LLM.
+    Embed every gold prompt question, reusing embeddings cached by earlier runs.
+
+    Only questions missing from the on-disk cache are sent, in one batched request.
+    Vectors are kept as float16, halving cache size; the precision loss is far
+    below what changes a top-k ranking.
 
     Args:
-        gold_prompts (List[dict]): List of evaluation items loaded from JSON.
-        retriever: LlamaIndex retriever instance (similarity_top_k is used).
-        k (int): Cutoff K for top-k retrieval.
+        prompts (List[dict]): Gold prompt items.
+        embed_model (Any): LlamaIndex embedding model.
 
     Return:
-        Tuple[List[dict], Dict[str, float]]: (per-row results, summary metrics).
+        List[np.ndarray]: One float16 embedding per prompt, in order.
     """
-    if hasattr(retriever, "similarity_top_k"):
-        setattr(retriever, "similarity_top_k", k)
+    questions = [p.get("question", "") for p in prompts]
+    keys = [_query_cache_key(embed_model.model_name, q) for q in questions]
+
+    with diskcache.Cache(QUERY_EMBED_CACHE_DIR) as cache:
+        embeddings = [cache.get(key) for key in keys]
+        missing = [i for i, vec in enumerate(embeddings) if vec is None]
+        if missing:
+            fresh = embed_model.get_text_embedding_batch(
+                [questions[i] for i in missing], show_progress=False
+            )
+            for i, vec in zip(missing, fresh):
+                embeddings[i] = np.asarray(vec, dtype=np.float16)
+                cache.set(keys[i], embeddings[i])
+    print(f"➡️  {len(questions) - len(missing)} question embeddings cached, {len(missing)} requested.")
+    return embeddings
 
-    rows: List[dict] = []
-    hit_url_sum = 0.0
-    mrr_sum = 0.0
-    contains_all_sum = 0.0
-    n = len(gold_prompts)
 
-    for i, item in enumerate(gold_prompts, start=1):
-        question: str = item.get("question", "")
-        expected_snippets: List[str] = item.get("expected_answer_contains", []) or []
-        expected_url_raw: str = item.get("source_link", "") or ""
+class _Hit(NamedTuple):
+    """A retrieved chunk, exposing the same get_text()/metadata/score as a NodeWithScore."""
 
-        expected_url = _normalize_url(expected_url_raw)
-        expected_norm_snips = [_normalize_text(s) for s in expected_snippets if s]
+    text: str
+    metadata: dict
+    score: float
 
-        hits = retriever.retrieve(question)
+    def get_text(self) -> str:
+        return self.text
 
-        # Build normalized views of retrieved data
-        hit_texts_norm = [_normalize_text(h.get_text()) for h in hits]
-        hit_urls_norm = [_normalize_url(_extract_url_from_hit(h)) for h in hits]
-        hit_titles = [str((h.metadata or {}).get("source") or "") for h in hits]
-        hit_scores = [float(getattr(h, "score", 0.0)) for h in hits]
 
-        for rank, hit in enumerate(hits, start=1):
-            print(
-                f"      Hit {rank}: URL={_extract_url_from_hit(hit)}, Score={getattr(hit, 'score', 0.0)}"
-            )
+def _query_hits(collection, query_embeddings: List[np.ndarray], k: int) -> List[List[_Hit]]:
+    """
+    Run the top-k similarity search for every question in one Chroma query.
 
-        # URL Hit@K and MRR@K (Mean Reciprocal Rank)
-        hit_at_k_url = 0.0  # how often does the retriever bring back the right page within K results
-        mrr_at_k_url = 0.0  # how high, on average, the right page is ranked.
-        if expected_url:
-            for rank, u in enumerate(hit_urls_norm, start=1):
-                if u and u == expected_url:
-                    hit_at_k_url = 1.0
-                    mrr_at_k_url = 1.0 / rank
-                    break
-
-        # ContainsAll@K: each snippet must appear in at least one of the top-k chunks (not necessarily the same chunk)
-        def snippet_covered(snippet_norm: str) -> bool:
-            return any(snippet_norm in txt for txt in hit_texts_norm)
-
-        contains_all_at_k = (
-            1.0
-            if expected_norm_snips
-            and all(snippet_covered(s) for s in expected_norm_snips)
-            else 0.0
+    Args:
+        collection (chromadb.Collection): Collection to search.
+        query_embeddings (List[np.ndarray]): Pre-computed question embeddings.
+        k (int): Number of results per question.
+
+    Return:
+        List[List[_Hit]]: Hits for each question, in order.
+    """
+    result = collection.query(
+        # One float32 matrix; Chroma takes NumPy arrays without a list round-trip
+        query_embeddings=np.asarray(query_embeddings, dtype=np.float32),
+        n_results=k,
+        include=["documents", "metadatas", "distances"],
+    )
+    # Same distance-to-similarity mapping as LlamaIndex's ChromaVectorStore
+    return [
+        [
+            _Hit(text or "", metadata or {}, math.exp(-distance))
+            for text, metadata, distance in zip(texts, metadatas, distances)
+        ]
+        for texts, metadatas, distances in zip(
+            result["documents"], result["metadatas"], result["distances"]
         )
+    ]
+
+
+def _eval_one(
+    item: dict,
+    hits: List[_Hit],
+    expected: Tuple[str, List[str]],
+    k: int,
+) -> Tuple[dict, List[str]]:
+    """
+    Build the result row for a single gold prompt from its retrieved hits.
+
+    URL Hit@K and MRR@K are left as None here and filled in by the batched
+    aggregation in `_evaluate_retriever`.
+
+    Args:
+        item (dict): Gold prompt item.
+        hits (List[_Hit]): Top-k hits retrieved for the prompt's question.
+        expected (Tuple[str, List[str]]): (normalized source URL, normalized snippets).
+        k (int): Cutoff K for top-k retrieval.
+
+    Return:
+        Tuple[dict, List[str]]: (result row, per-hit log lines; empty unless EVAL_VERBOSE).
+    """
+    _, expected_norm_snips = expected
+    question: str = item.get("question", "")
+    expected_snippets: List[str] = item.get("expected_answer_contains", []) or []
+    expected_url_raw: str = item.get("source_link", "") or ""
+
+    # Build normalized views of retrieved data
+    raw_texts = [h.get_text() for h in hits]
+    hit_texts_norm = [_normalize_text(t) for t in raw_texts]
+    hit_urls_raw = [_extract_url_from_hit(h, t) for h, t in zip(hits, raw_texts)]
+    hit_urls_norm = [_normalize_url(u) for u in hit_urls_raw]
+    hit_titles = [str((h.metadata or {}).get("source") or "") for h in hits]
+    hit_scores = [h.score for h in hits]
+
+    hit_lines = (
+        [
+            f"      Hit {rank}: URL={url}, Score={score}"
+            for rank, (url, score) in enumerate(zip(hit_urls_raw, hit_scores), start=1)
+        ]
+        if EVAL_VERBOSE
+        else []
+    )
+
+    # ContainsAll@K: each snippet must appear in at least one of the top-k chunks (not necessarily the same chunk)
+    contains_all_at_k = (
+        1.0
+        if expected_norm_snips and _covers_all(expected_norm_snips, hit_texts_norm)
+        else 0.0
+    )
 
-        # Row
-        rows.append(
-            {
-                "question": question,
-                "expected_answer_contains": expected_snippets,
-                "source_link": expected_url_raw,
-                "k": k,
-                "hit_at_k_url": hit_at_k_url if expected_url else None,
-                "mrr_at_k_url": mrr_at_k_url if expected_url else None,
-                "contains_all_at_k": contains_all_at_k,
-                "top1_url": hit_urls_norm[0] if hit_urls_norm else "",
-                "top1_score": hit_scores[0] if hit_scores else None,
-                "topk_urls": hit_urls_norm,
-                "topk_titles": hit_titles,
-                "comment": item.get("comment", ""),
-            }
+    row = {
+        "question": question,
+        "expected_answer_contains": expected_snippets,
+        "source_link": expected_url_raw,
+        "k": k,
+        "hit_at_k_url": None,
+        "mrr_at_k_url": None,
+        "contains_all_at_k": contains_all_at_k,
+        "top1_url": hit_urls_norm[0] if hit_urls_norm else "",
+        "top1_score": hit_scores[0] if hit_scores else None,
+        "topk_urls": hit_urls_norm,
+        "topk_titles": hit_titles,
+        "comment": item.get("comment", ""),
+    }
+    return row, hit_lines
+
+
+def _evaluate_retriever(
+    gold_prompts: List[dict], collection, embed_model, results_file: BinaryIO, k: int = K_DEFAULT
+) -> Dict[str, float]:
+    """
+    Evaluate retrieval quality against gold prompts without invoking an LLM.
+
+    All questions are searched in a single batched Chroma query. Each scored row
+    is appended to `results_file` as one JSON line as soon as it is final.
+
+    Args:
+        gold_prompts (List[dict]): List of evaluation items loaded from JSON.
+        collection (chromadb.Collection): Collection to query.
+        embed_model (Any): Embedding model matching the indexed vectors.
+        results_file (BinaryIO): Open binary file receiving per-row results as JSONL.
+        k (int): Cutoff K for top-k retrieval.
+
+    Return:
+        Dict[str, float]: Summary metrics.
+    """
+    n = len(gold_prompts)
+    if not n:
+        # Nothing to embed or query; Chroma rejects an empty query batch
+        print("❌ No gold prompts to evaluate.")
+        return {"k": float(k), "hit_at_k_url": 0.0, "mrr_at_k_url": 0.0, "contains_all_at_k": 0.0}
+    query_embeddings = _batch_embed(gold_prompts, embed_model)
+
+    # Normalize gold URLs and snippets once, up front
+    expected = [
+        (
+            _normalize_url(item.get("source_link", "") or ""),
+            [_normalize_text(s) for s in item.get("expected_answer_contains", []) or [] if s],
         )
+        for item in gold_prompts
+    ]
 
+    all_hits = _query_hits(collection, query_embeddings, k)
+    rows: List[dict] = []
+    hit_logs: List[List[str]] = []
+    for item, hits, exp in zip(gold_prompts, all_hits, expected):
+        row, hit_lines = _eval_one(item, hits, exp, k)
+        rows.append(row)
+        hit_logs.append(hit_lines)
+
+    # URL Hit@K (is the right page in the top K) and MRR@K (how high it is ranked),
+    # from the 1-based rank of each expected URL (0 when missing)
+    has_url = np.array([bool(url) for url, _ in expected], dtype=bool)
+    ranks = np.zeros(n, dtype=int)
+    for r, (row, (expected_url, _)) in enumerate(zip(rows, expected)):
         if expected_url:
-            hit_url_sum += hit_at_k_url
-            mrr_sum += mrr_at_k_url
-        contains_all_sum += contains_all_at_k
-
-        status = "✔" if (contains_all_at_k == 1.0 or hit_at_k_url == 1.0) else "✘"
-        print(f"[{i}/{n}] {status}  {question}")
+            urls = row["topk_urls"]
+            # Built back to front so a repeated URL keeps its best rank
+            url_to_rank = dict(zip(reversed(urls), range(len(urls), 0, -1)))
+            ranks[r] = url_to_rank.get(expected_url, 0)
+    hit_at_k = ranks > 0
+    mrr_at_k = np.where(hit_at_k, 1.0 / np.maximum(ranks, 1), 0.0)
+    contains_all = np.array([row["contains_all_at_k"] for row in rows], dtype=float)
+    denom_url = int(has_url.sum())
+
+    for i, (row, hit_lines, url_ok, hit, mrr) in enumerate(
+        zip(rows, hit_logs, has_url, hit_at_k, mrr_at_k), start=1
+    ):
+        # Each prompt's hits print right before its status line
+        for line in hit_lines:
+            print(line)
+        if url_ok:
+            row["hit_at_k_url"] = float(hit)
+            row["mrr_at_k_url"] = float(mrr)
+        status = "✔" if (row["contains_all_at_k"] == 1.0 or (url_ok and hit)) else "✘"
+        print(f"[{i}/{n}] {status}  {row['question']}")
+        results_file.write(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE))
 
-    denom_url = sum(1 for it in gold_prompts if (it.get("source_link") or "").strip())
     summary: Dict[str, float] = {
         "k": float(k),
-        "hit_at_k_url": (hit_url_sum / denom_url) if denom_url else 0.0,
-        "mrr_at_k_url": (mrr_sum / denom_url) if denom_url else 0.0,
-        "contains_all_at_k": contains_all_sum / n if n else 0.0,
+        "hit_at_k_url": float(hit_at_k.sum() / denom_url) if denom_url else 0.0,
+        "mrr_at_k_url": float(mrr_at_k.sum() / denom_url) if denom_url else 0.0,
+        "contains_all_at_k": float(contains_all.mean()),
     }
 
     print("\nSummary")
@@ -263,22 +439,21 @@ def _evaluate_retriever(
     print(f"  MRR@{k} (URL):       {summary['mrr_at_k_url']:.3f}")
     print(f"  ContainsAll@{k}:     {summary['contains_all_at_k']:.3f}")
 
-    return rows, summary
+    return summary
 
 
 def main() -> None:
     print("➡️ Starting retriever evaluation ...")
     gold_prompts = _load_gold_prompts(Path(GOLD_PROMPTS_PATH))
-    retriever = _get_retriever(k_default=K_DEFAULT)
-    rows, summary = _evaluate_retriever(gold_prompts, retriever, k=K_DEFAULT)
+    collection, embed_model = _open_collection()
 
-    # Persist results for inspection
+    # Persist results for inspection, one JSON object per line
     out_dir = Path("evaluation")
     out_dir.mkdir(parents=True, exist_ok=True)
-    with open(out_dir / "retriever_eval_results.json", "w", encoding="utf-8") as f:
-        json.dump(rows, f, indent=2, ensure_ascii=False)
-    with open(out_dir / "retriever_eval_summary.json", "w", encoding="utf-8") as f:
-        json.dump(summary, f, indent=2, ensure_ascii=False)
+    with open(out_dir / "retriever_eval_results.jsonl", "wb") as f:
+        summary = _evaluate_retriever(gold_prompts, collection, embed_model, f, k=K_DEFAULT)
+    with open(out_dir / "retriever_eval_summary.json", "wb") as f:
+        f.write(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
     print("✅ Evaluation completed")
 
 